@@ -1,137 +1,326 @@
+import functools
+import math
+import os
 import numpy as np
 from scipy.io import wavfile
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple, Union
 import warnings
 
+# numpy_rms only handles float32 audio. analyze_match passes int16 PCM, which
+# always takes the exact int64 einsum path below, so in the main pipeline this
+# speedup never runs; it applies to callers with float32 WAVs or arrays.
+try:
+    import numpy_rms
+except ImportError:
+    numpy_rms = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 warnings.filterwarnings("ignore", category=wavfile.WavFileWarning)
 
+# Samples processed per block when scanning the whole file
+_BLOCK_SAMPLES = 1 << 20
 
-def load_audio(audio_path: str) -> Tuple[int, np.ndarray]:
-    """Load audio file and return sample rate and data."""
-    sample_rate, audio_data = wavfile.read(audio_path)
+# Either a path to a WAV file or an already loaded (sample_rate, audio_data) pair
+AudioSource = Union[str, Tuple[int, np.ndarray]]
+
+
+@functools.lru_cache(maxsize=2)
+def _load_audio_cached(audio_path: str, mtime: float) -> Tuple[int, np.ndarray]:
+    """Memory-map a WAV file; keyed on mtime so edited files are re-read."""
+    sample_rate, audio_data = wavfile.read(audio_path, mmap=True)
     
-    # Convert stereo to mono if necessary
+    # Convert stereo to mono if necessary, keeping the PCM sample type
     if len(audio_data.shape) > 1:
-        audio_data = np.mean(audio_data, axis=1)
-    
-    # Normalize to float
-    audio_data = audio_data.astype(np.float32)
-    if audio_data.max() > 1:
-        audio_data = audio_data / np.abs(audio_data).max()
+        audio_data = np.mean(audio_data, axis=1).astype(audio_data.dtype)
+        # The array is shared between callers through the cache
+        audio_data.setflags(write=False)
     
     return sample_rate, audio_data
 
 
+def load_audio(audio_path: str) -> Tuple[int, np.ndarray]:
+    """Load audio file and return sample rate and mono data in its PCM sample type."""
+    return _load_audio_cached(audio_path, os.path.getmtime(audio_path))
+
+
+def _resolve_audio(audio: AudioSource) -> Tuple[int, np.ndarray]:
+    """Accept a path or a preloaded (sample_rate, audio_data) pair."""
+    if isinstance(audio, (str, os.PathLike)):
+        return load_audio(os.fspath(audio))
+    return audio
+
+
+def _full_scale(dtype: np.dtype) -> float:
+    """Amplitude that maps to 1.0: 32768 for int16 PCM, 1.0 for float audio."""
+    if np.issubdtype(dtype, np.integer):
+        return float(np.iinfo(dtype).max) + 1
+    return 1.0
+
+
+def _sum_squares(audio_chunk: np.ndarray) -> float:
+    """Sum of squared samples; integer PCM is accumulated exactly in int64."""
+    if np.issubdtype(audio_chunk.dtype, np.integer):
+        return float(np.einsum("i,i->", audio_chunk, audio_chunk, dtype=np.int64))
+    return float(np.einsum("i,i->", audio_chunk, audio_chunk, dtype=np.float64))
+
+
 def calculate_rms(audio_chunk: np.ndarray) -> float:
-    """Calculate Root Mean Square (RMS) of audio chunk."""
-    return np.sqrt(np.mean(audio_chunk ** 2))
+    """Calculate Root Mean Square (RMS) of audio chunk, relative to full scale."""
+    if len(audio_chunk) == 0:
+        return 0.0
+    if numpy_rms is not None and audio_chunk.dtype == np.float32:
+        # Fused SIMD square+sum+sqrt, no squared temporary (float32 input only;
+        # int16 PCM from extract_audio is summed exactly instead)
+        return float(numpy_rms.rms(np.ascontiguousarray(audio_chunk))[0])
+    return np.sqrt(_sum_squares(audio_chunk) / len(audio_chunk)) / _full_scale(audio_chunk.dtype)
 
 
 def calculate_peak(audio_chunk: np.ndarray) -> float:
-    """Calculate peak amplitude of audio chunk."""
-    return np.max(np.abs(audio_chunk))
+    """Calculate peak amplitude of audio chunk, relative to full scale."""
+    if len(audio_chunk) == 0:
+        return 0.0
+    # max/min instead of abs() avoids a temporary and int16 overflow at -32768
+    peak = max(abs(float(audio_chunk.max())), abs(float(audio_chunk.min())))
+    return peak / _full_scale(audio_chunk.dtype)
 
 
-def get_volume_for_segments(audio_path: str, segments: List[Dict]) -> List[Dict]:
-    """Calculate volume metrics for each transcript segment."""
-    sample_rate, audio_data = load_audio(audio_path)
-    total_duration = len(audio_data) / sample_rate
+def get_global_levels(audio: AudioSource) -> Tuple[float, float]:
+    """Return the whole-file RMS and peak used to normalize segment volumes.
     
-    # Calculate global stats for normalization
-    global_rms = calculate_rms(audio_data)
-    global_peak = calculate_peak(audio_data)
+    Integer PCM is reduced in its own sample type, so the file is never
+    converted to float.
+    """
+    _, audio_data = _resolve_audio(audio)
+    return float(calculate_rms(audio_data)), float(calculate_peak(audio_data))
+
+
+def _window_rms(audio_data: np.ndarray, window_samples: int) -> np.ndarray:
+    """RMS of consecutive fixed-size windows; a trailing partial window is kept."""
+    n_windows = len(audio_data) // window_samples
+    full = n_windows * window_samples
     
-    results = []
-    for segment in segments:
-        start_time = segment.get("start", 0)
-        end_time = segment.get("end", start_time + 5)
-        
-        # Convert time to sample indices
-        start_idx = int(start_time * sample_rate)
-        end_idx = int(end_time * sample_rate)
+    if numpy_rms is not None and n_windows > 0 and audio_data.dtype == np.float32:
+        # numpy_rms needs contiguous float32, so hand it one block of whole windows at a time.
+        # int16 PCM (the main pipeline) never gets here and uses the einsum path
+        step = max(1, _BLOCK_SAMPLES // window_samples) * window_samples
+        rms = np.concatenate([
+            numpy_rms.rms(np.ascontiguousarray(audio_data[i:min(i + step, full)]), window_size=window_samples)
+            for i in range(0, full, step)
+        ]).astype(np.float64)
+    else:
+        view = audio_data[:full].reshape(n_windows, window_samples)
+        # einsum fuses square and sum; integer PCM accumulates exactly in int64
+        acc_dtype = np.int64 if np.issubdtype(audio_data.dtype, np.integer) else np.float64
+        sum_squares = np.einsum("ij,ij->i", view, view, dtype=acc_dtype)
+        rms = np.sqrt(sum_squares / window_samples) / _full_scale(audio_data.dtype)
+    
+    if full < len(audio_data):
+        rms = np.append(rms, calculate_rms(audio_data[full:]))
+    return rms
+
+
+def _segment_levels(audio_data: np.ndarray, start_idx: np.ndarray,
+                    end_idx: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """RMS and peak of every [start, end) sample range.
+    
+    Ranges are grouped into spans of roughly _BLOCK_SAMPLES so only one block
+    of squared samples exists at a time. Each block is reduced with a single
+    np.add.reduceat / np.maximum.reduceat over the interleaved start/end
+    indices; the odd (between-range) results are discarded.
+    """
+    # Integer PCM is squared exactly in int64
+    acc_dtype = np.int64 if np.issubdtype(audio_data.dtype, np.integer) else np.float64
+    sum_squares = np.zeros(len(start_idx))
+    max_squares = np.zeros(len(start_idx))
+    order = np.argsort(start_idx, kind="stable")
+    
+    i = 0
+    while i < len(order):
+        block_start = start_idx[order[i]]
+        block_end = end_idx[order[i]]
+        j = i + 1
+        while j < len(order) and max(block_end, end_idx[order[j]]) - block_start <= _BLOCK_SAMPLES:
+            block_end = max(block_end, end_idx[order[j]])
+            j += 1
+        group = order[i:j]
         
-        # Clamp to valid range
-        start_idx = max(0, min(start_idx, len(audio_data) - 1))
-        end_idx = max(start_idx + 1, min(end_idx, len(audio_data)))
+        # A trailing zero keeps an end index equal to the span length valid for reduceat
+        squares = np.zeros(block_end - block_start + 1, dtype=acc_dtype)
+        np.square(audio_data[block_start:block_end], out=squares[:-1], dtype=acc_dtype)
         
-        # Extract audio chunk for this segment
-        chunk = audio_data[start_idx:end_idx]
+        bounds = np.empty(2 * len(group), dtype=np.intp)
+        bounds[0::2] = start_idx[group] - block_start
+        bounds[1::2] = end_idx[group] - block_start
+        sum_squares[group] = np.add.reduceat(squares, bounds)[0::2]
+        max_squares[group] = np.maximum.reduceat(squares, bounds)[0::2]
+        i = j
+    
+    lengths = end_idx - start_idx
+    full_scale = _full_scale(audio_data.dtype)
+    return np.sqrt(sum_squares / lengths) / full_scale, np.sqrt(max_squares) / full_scale
+
+
+def _timeline_and_peaks_kernel(audio, window_samples, norm, threshold, min_gap_windows):
+    """Windowed RMS, normalization and peak scan in a single loop (compiled with numba).
+    
+    Works on raw samples, so norm is in sample units (2 * global RMS * full scale).
+    """
+    n_samples = audio.shape[0]
+    n_windows = (n_samples + window_samples - 1) // window_samples
+    volumes = np.empty(n_windows, dtype=np.float64)
+    peaks = np.empty(n_windows, dtype=np.int64)
+    n_peaks = 0
+    last_peak = -min_gap_windows
+    
+    for w in range(n_windows):
+        start = w * window_samples
+        end = min(start + window_samples, n_samples)
+        total = 0.0
+        for i in range(start, end):
+            x = float(audio[i])
+            total += x * x
         
-        if len(chunk) > 0:
-            rms = calculate_rms(chunk)
-            peak = calculate_peak(chunk)
-            
-            # Normalize to 0-1 range relative to global stats
-            rms_normalized = min(rms / (global_rms * 2), 1.0) if global_rms > 0 else 0
-            peak_normalized = min(peak / global_peak, 1.0) if global_peak > 0 else 0
-            
-            # Combined volume score
-            volume_score = (rms_normalized * 0.7 + peak_normalized * 0.3)
-        else:
-            rms_normalized = 0
-            peak_normalized = 0
-            volume_score = 0
+        volume = min(math.sqrt(total / (end - start)) / norm, 1.0) if norm > 0 else 0.0
+        volumes[w] = volume
+        if volume >= threshold and w - last_peak >= min_gap_windows:
+            peaks[n_peaks] = w
+            n_peaks += 1
+            last_peak = w
+    
+    return volumes, peaks[:n_peaks]
+
+
+_timeline_and_peaks = njit(cache=True, nogil=True)(_timeline_and_peaks_kernel) if njit is not None else None
+
+
+def _volume_windows(audio_data: np.ndarray, window_samples: int, global_rms: float,
+                    threshold: float = np.inf, min_gap_windows: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Normalized volume of each window and the indices of windows that are volume peaks."""
+    norm = global_rms * 2
+    if _timeline_and_peaks is not None:
+        return _timeline_and_peaks(np.asarray(audio_data), window_samples,
+                                   norm * _full_scale(audio_data.dtype), threshold, min_gap_windows)
+    
+    rms = _window_rms(audio_data, window_samples)
+    volumes = np.minimum(rms / norm, 1.0) if norm > 0 else np.zeros_like(rms)
+    
+    peaks = []
+    last_peak = -min_gap_windows
+    for w in np.flatnonzero(volumes >= threshold):
+        if w - last_peak >= min_gap_windows:
+            peaks.append(w)
+            last_peak = w
+    
+    return volumes, np.array(peaks, dtype=np.int64)
+
+
+def get_volume_for_segments(audio: AudioSource, segments: List[Dict],
+                            global_rms: Optional[float] = None,
+                            global_peak: Optional[float] = None) -> List[Dict]:
+    """Calculate volume metrics for each transcript segment."""
+    sample_rate, audio_data = _resolve_audio(audio)
+    total_duration = len(audio_data) / sample_rate
+    
+    # Calculate global stats for normalization
+    if global_rms is None or global_peak is None:
+        global_rms, global_peak = get_global_levels((sample_rate, audio_data))
+    
+    start_times = [segment.get("start", 0) for segment in segments]
+    end_times = [segment.get("end", start + 5) for segment, start in zip(segments, start_times)]
+    
+    # Convert time to sample indices
+    start_idx = (np.array(start_times, dtype=np.float64) * sample_rate).astype(np.intp)
+    end_idx = (np.array(end_times, dtype=np.float64) * sample_rate).astype(np.intp)
+    
+    # Clamp to valid range
+    n_samples = len(audio_data)
+    start_idx = np.clip(start_idx, 0, max(n_samples - 1, 0))
+    end_idx = np.maximum(start_idx + 1, np.minimum(end_idx, n_samples))
+    
+    rms_normalized = np.zeros(len(segments))
+    peak_normalized = np.zeros(len(segments))
+    if n_samples > 0:
+        rms, peak = _segment_levels(audio_data, start_idx, end_idx)
         
-        results.append({
-            **segment,
-            "rms": float(round(rms_normalized, 3)),
-            "peak": float(round(peak_normalized, 3)),
-            "volume_score": float(round(volume_score, 3))
-        })
+        # Normalize to 0-1 range relative to global stats
+        if global_rms > 0:
+            rms_normalized = np.minimum(rms / (global_rms * 2), 1.0)
+        if global_peak > 0:
+            peak_normalized = np.minimum(peak / global_peak, 1.0)
+    
+    # Combined volume score
+    volume_scores = rms_normalized * 0.7 + peak_normalized * 0.3
+    
+    # Round whole columns at once; tolist() yields native Python floats
+    rms_values = np.round(rms_normalized, 3).tolist()
+    peak_values = np.round(peak_normalized, 3).tolist()
+    score_values = np.round(volume_scores, 3).tolist()
     
-    return results
+    return [
+        {**segment, "rms": r, "peak": p, "volume_score": v}
+        for segment, r, p, v in zip(segments, rms_values, peak_values, score_values)
+    ]
 
 
-def get_volume_timeline(audio_path: str, window_seconds: float = 2.0) -> List[Dict]:
+def get_volume_timeline(audio: AudioSource, window_seconds: float = 2.0,
+                        global_rms: Optional[float] = None) -> List[Dict]:
     """Get volume levels over time with fixed time windows."""
-    sample_rate, audio_data = load_audio(audio_path)
+    sample_rate, audio_data = _resolve_audio(audio)
     total_duration = len(audio_data) / sample_rate
     
     window_samples = int(window_seconds * sample_rate)
-    global_rms = calculate_rms(audio_data)
+    if global_rms is None:
+        global_rms, _ = get_global_levels((sample_rate, audio_data))
     
-    timeline = []
-    for i in range(0, len(audio_data), window_samples):
-        chunk = audio_data[i:i + window_samples]
-        if len(chunk) > 0:
-            rms = calculate_rms(chunk)
-            rms_normalized = min(rms / (global_rms * 2), 1.0) if global_rms > 0 else 0
-            
-            timeline.append({
-                "time": float(round(i / sample_rate, 2)),
-                "volume": float(round(rms_normalized, 3))
-            })
+    volumes, _ = _volume_windows(audio_data, window_samples, global_rms)
+    times = np.arange(len(volumes)) * (window_samples / sample_rate)
     
-    return timeline
+    return [
+        {"time": t, "volume": v}
+        for t, v in zip(np.round(times, 2).tolist(), np.round(volumes, 3).tolist())
+    ]
 
 
-def detect_volume_peaks(audio_path: str, threshold: float = 0.6, min_gap_seconds: float = 10.0) -> List[Dict]:
+def detect_volume_peaks(audio: AudioSource, threshold: float = 0.6, min_gap_seconds: float = 10.0,
+                        global_rms: Optional[float] = None) -> List[Dict]:
     """Detect moments where volume exceeds threshold (likely exciting moments)."""
-    timeline = get_volume_timeline(audio_path, window_seconds=1.0)
+    sample_rate, audio_data = _resolve_audio(audio)
+    window_samples = int(1.0 * sample_rate)
+    if global_rms is None:
+        global_rms, _ = get_global_levels((sample_rate, audio_data))
     
-    peaks = []
-    last_peak_time = -min_gap_seconds
+    # Peaks must be at least min_gap_seconds apart, expressed in whole windows
+    min_gap_windows = math.ceil(round(min_gap_seconds * sample_rate / window_samples, 6))
+    volumes, peak_idx = _volume_windows(audio_data, window_samples, global_rms,
+                                        threshold, min_gap_windows)
     
-    for point in timeline:
-        if point["volume"] >= threshold:
-            if point["time"] - last_peak_time >= min_gap_seconds:
-                peaks.append({
-                    "time": float(point["time"]),
-                    "volume": float(point["volume"]),
-                    "type": "high_volume_moment"
-                })
-                last_peak_time = point["time"]
+    times = np.round(peak_idx * (window_samples / sample_rate), 2).tolist()
+    peak_volumes = np.round(volumes[peak_idx], 3).tolist()
     
-    return peaks
+    return [
+        {"time": t, "volume": v, "type": "high_volume_moment"}
+        for t, v in zip(times, peak_volumes)
+    ]
 
 
-def get_audio_stats(audio_path: str) -> Dict:
+def get_audio_stats(audio: AudioSource, global_rms: Optional[float] = None,
+                    global_peak: Optional[float] = None) -> Dict:
     """Get overall audio statistics."""
-    sample_rate, audio_data = load_audio(audio_path)
+    sample_rate, audio_data = _resolve_audio(audio)
+    if global_rms is None or global_peak is None:
+        global_rms, global_peak = get_global_levels((sample_rate, audio_data))
+    
+    # Integer PCM is reported relative to its own peak, as if normalized to float
+    scale = global_peak if np.issubdtype(audio_data.dtype, np.integer) and global_peak > 0 else 1.0
     
     return {
         "duration_seconds": float(round(len(audio_data) / sample_rate, 2)),
         "sample_rate": int(sample_rate),
-        "average_volume": float(round(float(calculate_rms(audio_data)), 4)),
-        "peak_volume": float(round(float(calculate_peak(audio_data)), 4))
+        "average_volume": float(round(float(global_rms / scale), 4)),
+        "peak_volume": float(round(float(global_peak / scale), 4))
     }
+
@@ -1,5 +1,7 @@
 import subprocess
 import os
+import numpy as np
+from typing import Tuple
 
 
 def extract_audio(video_path: str, output_path: str = None) -> str:
@@ -17,3 +19,18 @@ def extract_audio(video_path: str, output_path: str = None) -> str:
     ], check=True, capture_output=True)
     
     return output_path
+
+
+def extract_audio_to_array(video_path: str, sample_rate: int = 16000) -> Tuple[int, np.ndarray]:
+    """Decode audio from video straight into memory as 16-bit mono PCM."""
+    if not os.path.exists(video_path):
+        raise FileNotFoundError(f"Video not found: {video_path}")
+    
+    result = subprocess.run([
+        "ffmpeg", "-i", video_path,
+        "-vn", "-f", "s16le", "-acodec", "pcm_s16le",
+        "-ar", str(sample_rate), "-ac", "1",
+        "pipe:1"
+    ], check=True, capture_output=True)
+    
+    return sample_rate, np.frombuffer(result.stdout, dtype=np.int16)
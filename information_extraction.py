@@ -1,6 +1,11 @@
+import os
 import spacy
 import re
-from typing import List, Dict
+from spacy.tokens import Doc
+from typing import List, Dict, Optional, Union
+
+from keyword_automaton import build_automaton
+from pipe_workers import pipe_n_process
 
 try:
     nlp = spacy.load("en_core_web_sm")
@@ -8,6 +13,10 @@ except OSError:
     print("spaCy model 'en_core_web_sm' not found. Please install it with: python -m spacy download en_core_web_sm")
     nlp = None
 
+# Transcript chunk size and batch size used when parsing with nlp.pipe
+PARSE_CHUNK_CHARS = 5000
+PARSE_BATCH_SIZE = 32
+
 GOAL_TIME_WINDOW = 15
 EVENT_TIME_WINDOW = 10
 
@@ -64,29 +73,77 @@ EVENT_PATTERNS = {
     ]
 }
 
+def _contains_keyword(text: str, automaton, keywords: List[str]) -> bool:
+    """Check whether any keyword occurs in text, in a single pass when possible."""
+    if automaton is not None:
+        return next(automaton.iter(text), None) is not None
+    return any(keyword in text for keyword in keywords)
+
+
+OFFICIAL_AC = build_automaton(OFFICIAL_KEYWORDS)
+STADIUM_AC = build_automaton(STADIUM_KEYWORDS)
+
+# One alternation per pattern group, compiled once at import
+FOOTBALL_CONTEXT_RE = re.compile(
+    "|".join(f"(?:{p})" for p in FOOTBALL_CONTEXT_PATTERNS), re.IGNORECASE
+)
+
+EVENT_COMPILED = {
+    event_type: re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+    for event_type, patterns in EVENT_PATTERNS.items()
+}
+
+
+def _split_paragraphs(text: str, max_chars: int = PARSE_CHUNK_CHARS) -> List[str]:
+    """Split a transcript into paragraph-sized chunks on sentence boundaries."""
+    chunks = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        current = ""
+        for sentence in re.split(r"(?<=[.!?])\s+", paragraph.strip()):
+            if current and len(current) + len(sentence) + 1 > max_chars:
+                chunks.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+        if current:
+            chunks.append(current)
+    return chunks
+
+
+def parse_text(text: str, batch_size: int = PARSE_BATCH_SIZE) -> Optional[Doc]:
+    """Parse a transcript once so preprocessing and NER can share the Doc."""
+    if nlp is None:
+        return None
+
+    paragraphs = _split_paragraphs(text)
+    if not paragraphs:
+        return nlp.make_doc("")
+
+    # Only fan out to worker processes when each gets at least a full batch
+    n_process = pipe_n_process(len(paragraphs), batch_size, max_workers=(os.cpu_count() or 2) // 2)
+    docs = list(nlp.pipe(paragraphs, batch_size=batch_size, n_process=n_process))
+    return Doc.from_docs(docs)
+
 
-def extract_entities(text: str) -> Dict[str, List[str]]:
+def extract_entities(text: Union[str, Doc]) -> Dict[str, List[str]]:
     if nlp is None:
         return {"persons": [], "teams": [], "possible_teams": [], "stadiums": [], "locations": [], "officials": [], "player_team_map": {}}
     
-    doc = nlp(text)
-
-    teams = set()
-    possible_teams = set()
-    stadiums = set()
-    persons = set()
-    locations = set()
-    officials = set()
+    doc = text if isinstance(text, Doc) else nlp(text)
+
+    # Dicts used as ordered sets: de-duplicate while keeping first-seen order
+    teams = {}
+    possible_teams = {}
+    stadiums = {}
+    persons = {}
+    locations = {}
+    officials = {}
     player_team_map = {}  # Maps player -> team
 
     for sent in doc.sents:
         sent_lower = sent.text.lower()
-        has_football_context = any(
-            re.search(p, sent_lower) for p in FOOTBALL_CONTEXT_PATTERNS
-        )
-        has_official_context = any(
-            keyword in sent_lower for keyword in OFFICIAL_KEYWORDS
-        )
+        has_football_context = FOOTBALL_CONTEXT_RE.search(sent_lower) is not None
+        has_official_context = _contains_keyword(sent_lower, OFFICIAL_AC, OFFICIAL_KEYWORDS)
 
         # Collect entities in this sentence
         sent_persons = []
@@ -98,23 +155,23 @@ def extract_entities(text: str) -> Dict[str, List[str]]:
 
             if label == "PERSON":
                 if has_official_context:
-                    officials.add(value)
+                    officials[value] = None
                 else:
-                    persons.add(value)
+                    persons[value] = None
                     sent_persons.append(value)
 
             elif label in ["ORG", "NORP", "GPE"]:
                 if has_football_context:
-                    teams.add(value)
+                    teams[value] = None
                     sent_teams.append(value)
                 else:
-                    possible_teams.add(value)
+                    possible_teams[value] = None
 
             elif label in ["FAC", "LOC"]:
-                if any(k in value.lower() for k in STADIUM_KEYWORDS):
-                    stadiums.add(value)
+                if _contains_keyword(value.lower(), STADIUM_AC, STADIUM_KEYWORDS):
+                    stadiums[value] = None
                 else:
-                    locations.add(value)
+                    locations[value] = None
 
         # Associate players with teams mentioned in the same sentence
         if sent_teams and sent_persons:
@@ -140,10 +197,9 @@ def detect_events_with_timestamps(segments: List[Dict]) -> List[Dict]:
     for segment in segments:
         text = segment["text"]
         start_time = segment["start"]
-        text_lower = text.lower()
 
-        for event_type, patterns in EVENT_PATTERNS.items():
-            if any(re.search(p, text_lower) for p in patterns):
+        for event_type, pattern in EVENT_COMPILED.items():
+            if pattern.search(text):
                 events.append({
                     "type": event_type,
                     "text": text.strip(),
@@ -151,20 +207,27 @@ def detect_events_with_timestamps(segments: List[Dict]) -> List[Dict]:
                 })
                 break
 
-    deduplicated = []
-    for event in events:
-        window = GOAL_TIME_WINDOW if event["type"] == "goal" else EVENT_TIME_WINDOW
+    # Bucket candidates by type, then sweep each bucket in time order so an
+    # event is kept only if it is a full window after the last kept one
+    by_type = {}
+    for index, event in enumerate(events):
+        by_type.setdefault(event["type"], []).append((index, event))
 
-        if not any(
-            e["type"] == event["type"] and abs(e["time"] - event["time"]) < window
-            for e in deduplicated
-        ):
-            deduplicated.append(event)
+    kept = []
+    for event_type, candidates in by_type.items():
+        window = GOAL_TIME_WINDOW if event_type == "goal" else EVENT_TIME_WINDOW
+        last_kept_time = None
+        for index, event in sorted(candidates, key=lambda c: c[1]["time"]):
+            if last_kept_time is None or event["time"] - last_kept_time >= window:
+                kept.append((index, event))
+                last_kept_time = event["time"]
 
-    return deduplicated
+    # Restore the original segment order
+    kept.sort(key=lambda k: k[0])
+    return [event for _, event in kept]
 
 
-def extract_information(text: str, segments: List[Dict] = None) -> Dict:
+def extract_information(text: Union[str, Doc], segments: List[Dict] = None) -> Dict:
     entities = extract_entities(text)
     events = detect_events_with_timestamps(segments) if segments else []
 
@@ -1,9 +1,18 @@
 import json
 import csv
+import re
+import matplotlib
+matplotlib.use("Agg")  # Plots are only written to files; skip GUI backend setup
 import matplotlib.pyplot as plt
 from collections import Counter
-from typing import List, Dict
+from typing import List, Dict, Optional
 import os
+from keyword_automaton import build_automaton
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 def generate_event_timeline(events: List[Dict]) -> List[Dict]:
@@ -19,28 +28,73 @@ def generate_event_timeline(events: List[Dict]) -> List[Dict]:
     return timeline
 
 
-def calculate_player_mentions(text: str, players: List[str]) -> Dict[str, int]:
-    """Count player mentions as performance indicator."""
+def calculate_player_mentions(text: str, players: List[str], top_n: Optional[int] = 20) -> Dict[str, int]:
+    """Count player mentions as performance indicator.
+    
+    All names are matched in a single leftmost-longest sweep over the text,
+    so "Cristiano Ronaldo" is not also counted as a mention of "Ronaldo".
+    Returns the top_n most mentioned players (all of them if top_n is None).
+    """
     text_lower = text.lower()
-    mentions = {}
+    names = {player.lower() for player in players if player}
+    counts = Counter()
+    
+    automaton = build_automaton(names)
+    if automaton is not None:
+        counts.update(name for _, name in automaton.iter_long(text_lower))
+    elif names:
+        # Longest names first so the alternation prefers the longest match
+        pattern = re.compile("|".join(re.escape(name) for name in sorted(names, key=len, reverse=True)))
+        counts.update(match.group() for match in pattern.finditer(text_lower))
+    
+    mentions = Counter()
     for player in players:
-        count = text_lower.count(player.lower())
+        count = counts[player.lower()] if player else 0
         if count > 0:
             mentions[player] = count
-    return dict(sorted(mentions.items(), key=lambda x: x[1], reverse=True))
+    return dict(mentions.most_common(top_n))
+
+
+def _count_overlapping(text: str, sub: str) -> int:
+    """Count occurrences of sub in text, overlapping ones included (as the automaton does)."""
+    count = 0
+    start = text.find(sub)
+    while start != -1:
+        count += 1
+        start = text.find(sub, start + 1)
+    return count
 
 
 def calculate_team_momentum(segments: List[Dict], team_keywords: Dict[str, List[str]]) -> List[Dict]:
-    """Calculate team momentum over time based on mentions."""
+    """Calculate team momentum over time based on mentions.
+    
+    A team's score for a segment is the number of times its keywords occur
+    in the segment text, overlapping occurrences included.
+    """
+    # Map each keyword to the team(s) it counts for
+    keyword_teams = {}
+    for team, keywords in team_keywords.items():
+        for kw in keywords:
+            if kw:
+                keyword_teams.setdefault(kw, []).append(team)
+    
+    automaton = build_automaton(keyword_teams)
+    
     momentum = []
     for seg in segments:
         text_lower = seg.get("text", "").lower()
         time = seg.get("start", 0)
         
-        scores = {}
-        for team, keywords in team_keywords.items():
-            score = sum(1 for kw in keywords if kw in text_lower)
-            scores[team] = score
+        scores = dict.fromkeys(team_keywords, 0)
+        if automaton is not None:
+            for _, teams in automaton.iter(text_lower):
+                for team in teams:
+                    scores[team] += 1
+        else:
+            for kw, teams in keyword_teams.items():
+                count = _count_overlapping(text_lower, kw)
+                for team in teams:
+                    scores[team] += count
         
         momentum.append({"time": time, **scores})
     return momentum
@@ -94,17 +148,16 @@ def plot_excitement_graph(excitement_data: List[Dict], output_path: str = "excit
     times = [d["time"] / 60 for d in excitement_data]  # Convert to minutes
     intensities = [d["intensity"] for d in excitement_data]
     
-    plt.figure(figsize=(12, 4))
-    plt.plot(times, intensities, color='blue', alpha=0.7)
-    plt.fill_between(times, intensities, alpha=0.3)
-    plt.xlabel("Time (minutes)")
-    plt.ylabel("Excitement Intensity")
-    plt.title("Commentary Excitement Over Time")
-    plt.ylim(0, 1)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=150)
-    plt.close()
+    fig, ax = plt.subplots(figsize=(12, 4), layout="tight")
+    ax.plot(times, intensities, color='blue', alpha=0.7, rasterized=True)
+    ax.fill_between(times, intensities, alpha=0.3, rasterized=True)
+    ax.set_xlabel("Time (minutes)")
+    ax.set_ylabel("Excitement Intensity")
+    ax.set_title("Commentary Excitement Over Time")
+    ax.set_ylim(0, 1)
+    ax.grid(True, alpha=0.3)
+    fig.savefig(output_path, dpi=150)
+    plt.close(fig)
     return output_path
 
 
@@ -113,34 +166,42 @@ def plot_event_timeline(events: List[Dict], output_path: str = "event_timeline.p
     if not events:
         return None
     
-    event_types = list(set(e["type"] for e in events))
     colors = {"goal": "green", "foul": "orange", "yellow_card": "yellow", 
               "red_card": "red", "substitution": "blue", "injury": "purple"}
     
-    plt.figure(figsize=(12, 3))
+    # Group event times by type so each type is one line collection and one legend entry
+    times_by_type = {}
     for event in events:
-        time = event.get("time", 0) / 60
-        etype = event["type"]
-        color = colors.get(etype, "gray")
-        plt.axvline(x=time, color=color, alpha=0.7, linewidth=2, label=etype)
-    
-    # Remove duplicate labels
-    handles, labels = plt.gca().get_legend_handles_labels()
-    by_label = dict(zip(labels, handles))
-    plt.legend(by_label.values(), by_label.keys(), loc='upper right')
-    
-    plt.xlabel("Time (minutes)")
-    plt.title("Match Event Timeline")
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=150)
-    plt.close()
+        times_by_type.setdefault(event["type"], []).append(event.get("time", 0) / 60)
+    
+    fig, ax = plt.subplots(figsize=(12, 3), layout="tight")
+    for etype, times in times_by_type.items():
+        ax.vlines(times, 0, 1, colors=colors.get(etype, "gray"), alpha=0.7, linewidth=2, label=etype)
+    
+    ax.set_ylim(0, 1)
+    ax.legend(loc='upper right')
+    ax.set_xlabel("Time (minutes)")
+    ax.set_title("Match Event Timeline")
+    fig.savefig(output_path, dpi=150)
+    plt.close(fig)
     return output_path
 
 
 def export_to_json(data: Dict, output_path: str = "match_insights.json"):
     """Export insights to JSON file."""
-    with open(output_path, 'w') as f:
-        json.dump(data, f, indent=2)
+    # Serialize before opening the file so an encoding error leaves no empty file
+    if orjson is not None:
+        # Native encoder; also serializes NumPy scalars and arrays directly.
+        # OPT_NON_STR_KEYS accepts int keys the way json.dumps does
+        payload = orjson.dumps(
+            data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+        with open(output_path, 'wb') as f:
+            f.write(payload)
+    else:
+        payload = json.dumps(data, indent=2)
+        with open(output_path, 'w') as f:
+            f.write(payload)
     return output_path
 
 
@@ -149,16 +210,20 @@ def export_to_csv(events: List[Dict], output_path: str = "match_events.csv"):
     if not events:
         return None
     
+    rows = [
+        {
+            "time": event.get("time", 0),
+            "minute": int(event.get("time", 0) // 60),
+            "type": event.get("type", ""),
+            "description": event.get("text", "")[:100]
+        }
+        for event in events
+    ]
+    
     with open(output_path, 'w', newline='') as f:
         writer = csv.DictWriter(f, fieldnames=["time", "minute", "type", "description"])
         writer.writeheader()
-        for event in events:
-            writer.writerow({
-                "time": event.get("time", 0),
-                "minute": int(event.get("time", 0) // 60),
-                "type": event.get("type", ""),
-                "description": event.get("text", "")[:100]
-            })
+        writer.writerows(rows)
     return output_path
 
 
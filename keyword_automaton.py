@@ -0,0 +1,24 @@
+from typing import Any, Iterable, Mapping, Union
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+def build_automaton(words: Union[Iterable[str], Mapping[str, Any]]):
+    """Build an Aho-Corasick automaton over words (None without pyahocorasick or words).
+    
+    A mapping stores its value as each word's payload; otherwise the payload
+    is the word itself.
+    """
+    if ahocorasick is None:
+        return None
+    entries = words.items() if isinstance(words, Mapping) else ((word, word) for word in words)
+    automaton = ahocorasick.Automaton()
+    for word, value in entries:
+        automaton.add_word(word, value)
+    if len(automaton) == 0:
+        return None
+    automaton.make_automaton()
+    return automaton
@@ -1,14 +1,20 @@
 import os
 import json
 import re
-from extract_audio import extract_audio
+from concurrent.futures import ThreadPoolExecutor
+from extract_audio import extract_audio_to_array
 from transcribe_audio import transcribe_audio
 from pre_process import preprocess_text
-from information_extraction import extract_information
+from information_extraction import parse_text, extract_information
 from sentiment_analyzer import analyze_sentiment, get_intensity_summary
 from summarization import generate_structured_summary
 from insights import generate_all_insights
-from audio_volume import get_volume_for_segments, detect_volume_peaks, get_audio_stats
+from audio_volume import get_global_levels, get_volume_for_segments, detect_volume_peaks, get_audio_stats
+
+
+# "Team1 X - Y Team2" with a hyphen or en dash between the scores
+_MATCH_NAME_RE = re.compile(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s+(\d+)\s*[-\u2013]\s*(\d+)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)')
+_FILENAME_UNSAFE_RE = re.compile(r'[^\w\s-]')
 
 
 def get_match_name(video_path):
@@ -17,12 +23,12 @@ def get_match_name(video_path):
     # Remove extension
     name = os.path.splitext(filename)[0]
     # Extract team names pattern: "Team1 X - Y Team2"
-    match = re.search(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s+(\d+)\s*[-–]\s*(\d+)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)', name)
+    match = _MATCH_NAME_RE.search(name)
     if match:
         team1, score1, score2, team2 = match.groups()
         return f"{team1.replace(' ', '_')}_vs_{team2.replace(' ', '_')}_{score1}-{score2}"
     # Fallback: clean filename
-    return re.sub(r'[^\w\s-]', '', name).replace(' ', '_')[:50]
+    return _FILENAME_UNSAFE_RE.sub('', name).replace(' ', '_')[:50]
 
 
 def save_to_file(content, filepath):
@@ -50,32 +56,46 @@ def analyze_match(video_path):
     # Create output directory
     os.makedirs(output_dir, exist_ok=True)
     
-    # Extract audio
-    audio = extract_audio(video_path)
-    print(f"Audio extracted: {audio}")
+    # Extract audio into memory; Whisper and the volume analysis share the samples
+    audio = extract_audio_to_array(video_path)
+    sample_rate, audio_samples = audio
+    print(f"Audio extracted: {len(audio_samples) / sample_rate:.1f}s at {sample_rate} Hz")
     
     # Transcribe
-    result = transcribe_audio(audio)
+    result = transcribe_audio(audio_samples)
     text = result["text"]
     segments = result["segments"]
     
     # Save transcript
     save_to_file(text, f"{output_dir}/{match_name}_transcript.txt")
     
-    # Preprocess
-    prep = preprocess_text(text)
-    preprocessed_output = f"Sentences: {len(prep['sentences'])}\nClean Tokens: {len(prep['clean_tokens'])}\n\nClean Text:\n{prep['clean_text']}"
-    save_to_file(preprocessed_output, f"{output_dir}/{match_name}_preprocessed.txt")
-    
-    # Information Extraction
-    info = extract_information(text, segments)
-    save_to_file(info['events'], f"{output_dir}/{match_name}_events.json")
+    # Parse once with spaCy; preprocessing and NER share the Doc. This runs
+    # before the thread pool starts because nlp.pipe may fork worker processes,
+    # and forking while the volume threads run can deadlock.
+    doc = parse_text(text)
     
-    # Audio Volume Analysis
-    print("Analyzing audio volume levels...")
-    segments_with_volume = get_volume_for_segments(audio, segments)
-    volume_peaks = detect_volume_peaks(audio)
-    audio_stats = get_audio_stats(audio)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        # Audio Volume Analysis runs in the background; NumPy releases the GIL
+        print("Analyzing audio volume levels...")
+        global_rms, global_peak = get_global_levels(audio)
+        volume_future = executor.submit(get_volume_for_segments, audio, segments, global_rms, global_peak)
+        peaks_future = executor.submit(detect_volume_peaks, audio, global_rms=global_rms)
+        stats_future = executor.submit(get_audio_stats, audio, global_rms, global_peak)
+        
+        # Information Extraction only needs the text and segments
+        info_future = executor.submit(extract_information, doc if doc is not None else text, segments)
+        
+        # Preprocess
+        prep = preprocess_text(doc if doc is not None else text)
+        preprocessed_output = f"Sentences: {len(prep['sentences'])}\nClean Tokens: {len(prep['clean_tokens'])}\n\nClean Text:\n{prep['clean_text']}"
+        save_to_file(preprocessed_output, f"{output_dir}/{match_name}_preprocessed.txt")
+        
+        info = info_future.result()
+        save_to_file(info['events'], f"{output_dir}/{match_name}_events.json")
+        
+        segments_with_volume = volume_future.result()
+        volume_peaks = peaks_future.result()
+        audio_stats = stats_future.result()
     
     # Sentiment Analysis (with audio volume)
     analyzed = analyze_sentiment(segments, segments_with_volume)
@@ -0,0 +1,22 @@
+import multiprocessing
+import os
+from typing import Optional
+
+
+def pipe_n_process(n_items: int, items_per_worker: int, max_workers: Optional[int] = None) -> int:
+    """Number of worker processes for nlp.pipe over n_items texts.
+    
+    One worker per items_per_worker texts, capped at max_workers (default
+    cpu_count - 1). Under "spawn" (macOS, Windows) and "forkserver" (Linux
+    default from Python 3.14) each worker re-imports the caller and reloads
+    the model, so this stays at 1 unless the start method is "fork".
+    """
+    # allow_none=True reads the start method without fixing it for the host
+    # application; when unset, the platform default is listed first
+    start_method = (multiprocessing.get_start_method(allow_none=True)
+                    or multiprocessing.get_all_start_methods()[0])
+    if start_method != "fork":
+        return 1
+    if max_workers is None:
+        max_workers = (os.cpu_count() or 2) - 1
+    return max(1, min(max_workers, n_items // items_per_worker))
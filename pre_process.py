@@ -1,22 +1,42 @@
 import spacy
 import re
+from spacy.tokens import Doc
+from typing import Union
 
 
-# Load English model
-nlp = spacy.load("en_core_web_sm")
+# Load English model without the parser and NER, which preprocessing never uses.
+# The statistical senter replaces the parser for sentence boundaries; the tagger
+# and attribute_ruler stay because the rule-based lemmatizer needs their POS tags.
+nlp = spacy.load("en_core_web_sm", disable=["parser", "ner"])
+nlp.enable_pipe("senter")
 
 
-def preprocess_text(text: str) -> dict:
+def _remove_noise(text: str) -> str:
+    """Remove special characters and collapse whitespace."""
+    text = re.sub(r'[^\w\s.,!?]', '', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def preprocess_text(text: Union[str, Doc]) -> dict:
     """
     Apply NLP preprocessing to text using spaCy.
     Returns tokenized, cleaned, and lemmatized text.
-    """
-    # Noise removal - remove special characters and extra whitespace
-    text = re.sub(r'[^\w\s.,!?]', '', text)
-    text = re.sub(r'\s+', ' ', text).strip()
     
-    # Process with spaCy
-    doc = nlp(text)
+    An already parsed Doc (e.g. from information_extraction.parse_text) is
+    used as-is, so its tokens come from the raw text: noise removal only
+    applies to "original". This changes clean_tokens for text with apostrophes,
+    hyphens or dashes, e.g. "Ronaldo's free-kick" gives "ronaldo", "free",
+    "kick" instead of "ronaldos", "freekick".
+    """
+    if isinstance(text, Doc):
+        doc = text
+        text = _remove_noise(doc.text)
+    else:
+        # Noise removal - remove special characters and extra whitespace
+        text = _remove_noise(text)
+        
+        # Process with spaCy
+        doc = nlp(text)
     
     # Sentence segmentation
     sentences = [sent.text for sent in doc.sents]
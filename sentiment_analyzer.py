@@ -1,14 +1,39 @@
 import re
+import numpy as np
 import spacy
-from typing import List, Dict
+from collections import Counter
+from functools import lru_cache
+from typing import List, Dict, NamedTuple, Tuple
+from spacy.util import load_language_data, registry
+from keyword_automaton import build_automaton
+from pipe_workers import pipe_n_process
 
-# Load spaCy model
+# Load spaCy model; only lemmas and coarse POS are used, so skip parser and NER.
+# attribute_ruler stays enabled: it maps tagger output to pos_, which the
+# rule-based lemmatizer depends on.
 try:
-    nlp = spacy.load("en_core_web_sm")
+    nlp = spacy.load("en_core_web_sm", disable=["parser", "ner"])
 except OSError:
     print("spaCy model 'en_core_web_sm' not found. Please install it with: python -m spacy download en_core_web_sm")
     nlp = None
 
+# Lexicon matching only needs lowercased words, mapped to lemmas through the
+# lookup table from spacy-lookups-data (a requirement). The lexicon entries are
+# base forms already, so without the table inflected forms ("scored", "goals")
+# are missed and intensity scores drop.
+# The statistical pipeline is then only run to tag segments with excitement hits.
+# The raw form -> lemma dict is kept (rather than a spaCy Table, which only
+# stores key hashes) so the lexicon automaton can be built from its inverse.
+if "en" in registry.lookups:
+    LEMMA_LOOKUP = load_language_data(registry.lookups.get("en")["lemma_lookup"])
+else:
+    print("spacy-lookups-data not found; inflected lexicon words will not be matched. Please install it with: pip install spacy-lookups-data")
+    LEMMA_LOOKUP = None
+
+# Words, with "n't" split off the way spaCy's tokenizer does ("don't" -> "do", "n't")
+_TOKEN_RE = re.compile(r"\w+?(?=n't\b)|n't\b|\w+(?:'\w+)*")
+_LETTER_RE = re.compile(r"[^\W\d_]")
+
 # Excitement indicators with lemma forms
 EXCITEMENT_LEMMAS = {
     "goal", "score", "brilliant", "amazing", "incredible", "fantastic",
@@ -32,6 +57,46 @@ INTENSIFIERS = {
 # Negation words that flip sentiment
 NEGATIONS = {"not", "no", "never", "none", "nothing", "neither", "nobody"}
 
+LEXICONS = {
+    "excitement": EXCITEMENT_LEMMAS,
+    "tension": TENSION_LEMMAS,
+    "intensifier": INTENSIFIERS,
+    "negation": NEGATIONS
+}
+
+
+def _lemmatize(token: str) -> str:
+    """Lexicon lemma for a lowercased token, as the token path sees it."""
+    if LEMMA_LOOKUP is not None:
+        return LEMMA_LOOKUP.get(token, token)
+    return "not" if token == "n't" else token
+
+
+def _lexicon_candidates() -> set:
+    """Lexicon words, "n't", and (with spacy-lookups-data) every form the lemma table maps to one."""
+    lexicon_words = set().union(*LEXICONS.values())
+    candidates = lexicon_words | {"n't"}
+    if LEMMA_LOOKUP is not None:
+        candidates.update(form for form, lemma in LEMMA_LOOKUP.items() if lemma in lexicon_words)
+    return candidates
+
+
+def _lexicon_forms() -> Dict[str, str]:
+    """Category of every single-token form that lemmatizes to a lexicon word."""
+    category_of = {lemma: category for category, lemmas in LEXICONS.items() for lemma in lemmas}
+    return {
+        form: category_of[_lemmatize(form)]
+        for form in _lexicon_candidates()
+        if _lemmatize(form) in category_of and _TOKEN_RE.findall(form.lower()) == [form]
+    }
+
+
+LEXICON_FORMS = _lexicon_forms()
+
+
+# Matched against the space-joined tokens, so every hit is a whole token
+LEXICON_AC = build_automaton({f" {form} ": category for form, category in LEXICON_FORMS.items()})
+
 INTENSITY_PATTERNS = {
     "high": [
         r"!{2,}",                    # Multiple exclamation marks
@@ -51,66 +116,132 @@ INTENSITY_PATTERNS = {
     ]
 }
 
+# Compiled once at import; calculate_intensity runs for every segment
+INTENSITY_PATTERNS_COMPILED = {
+    level: [re.compile(p, re.IGNORECASE) for p in patterns]
+    for level, patterns in INTENSITY_PATTERNS.items()
+}
 
-def analyze_with_spacy(text: str) -> Dict:
-    """Use spaCy for linguistic analysis of the text."""
-    if nlp is None:
-        return {"excitement_score": 0, "tension_score": 0, "has_intensifier": False, "has_negation": False}
-    
-    doc = nlp(text)
+# bytes.translate deletion sets: what is left over is the uppercase / alphabetic bytes
+_ASCII_NON_UPPER = bytes(i for i in range(128) if not chr(i).isupper())
+_ASCII_NON_ALPHA = bytes(i for i in range(128) if not chr(i).isalpha())
+
+
+def _count_chars(text: str) -> Tuple[int, int, int, int]:
+    """Count '!', '?', uppercase and alphabetic characters in text."""
+    if text.isascii():
+        # Transcripts are almost always ASCII: count with C-level bytes scans
+        data = text.encode("ascii")
+        caps_chars = len(data.translate(None, _ASCII_NON_UPPER))
+        alpha_chars = len(data.translate(None, _ASCII_NON_ALPHA))
+        return data.count(b"!"), data.count(b"?"), caps_chars, alpha_chars
     
-    excitement_count = 0
-    tension_count = 0
-    intensifier_count = 0
-    has_negation = False
+    char_counts = Counter(text)
+    caps_chars = 0
+    alpha_chars = 0
+    for char, count in char_counts.items():
+        if char.isupper():
+            caps_chars += count
+        if char.isalpha():
+            alpha_chars += count
+    return char_counts["!"], char_counts["?"], caps_chars, alpha_chars
+
+
+def _lexicon_hits(text: str) -> Tuple[Counter, int]:
+    """Count lexicon hits per category and the number of words in text."""
+    # Every lexicon word has letters, so blank ("", "  ") and letter-free
+    # ("...", "3-0") segments are settled without any lexicon lookup
+    if not _LETTER_RE.search(text):
+        return Counter(), len(_TOKEN_RE.findall(text))
     
-    # Analyze each token
-    for token in doc:
-        lemma = token.lemma_.lower()
-        
-        # Check for excitement words
-        if lemma in EXCITEMENT_LEMMAS:
-            excitement_count += 1
-        
-        # Check for tension words
-        if lemma in TENSION_LEMMAS:
-            tension_count += 1
-        
-        # Check for intensifiers
-        if lemma in INTENSIFIERS:
-            intensifier_count += 1
-        
-        # Check for negations
-        if lemma in NEGATIONS:
-            has_negation = True
+    tokens = _TOKEN_RE.findall(text.lower())
+    hits = _automaton_hits(tokens) if LEXICON_AC is not None else _lemma_hits(tokens)
+    return hits, len(tokens)
+
+
+def _automaton_hits(tokens: List[str]) -> Counter:
+    """Lexicon hits per category, in one Aho-Corasick scan over the joined tokens."""
+    return Counter(category for _, category in LEXICON_AC.iter(f" {' '.join(tokens)} "))
+
+
+def _lemma_hits(tokens: List[str]) -> Counter:
+    """Lexicon hits per category, by lemmatizing each token and intersecting with the lexicons."""
+    lemma_counts = Counter(_lemmatize(token) for token in tokens)
+    return Counter({
+        category: sum(lemma_counts[w] for w in lexicon.intersection(lemma_counts))
+        for category, lexicon in LEXICONS.items()
+    })
+
+
+def _needs_tagging(hits: Counter) -> bool:
+    """Whether POS tags can change the score, i.e. the segment has excitement words."""
+    return nlp is not None and hits["excitement"] > 0
+
+
+class _SpacyAnalysis(NamedTuple):
+    excitement_score: float
+    tension_score: float
+    has_intensifier: bool
+    has_negation: bool
+    adjective_count: int
+    word_count: int
+
+
+def analyze_with_spacy(text: str) -> Dict:
+    """Use spaCy for linguistic analysis of the text."""
+    return _analyze_text(text)._asdict()
+
+
+@lru_cache(maxsize=4096)
+def _analyze_text(text: str) -> _SpacyAnalysis:
+    """Cached analysis; commentary repeats itself ("goal!", crowd chants)."""
+    hits, word_count = _lexicon_hits(text)
+    tagged = nlp(text) if _needs_tagging(hits) else ()
+    return _analyze_hits(hits, word_count, tagged)
+
+
+def _analyze_hits(hits: Counter, word_count: int, tagged=()) -> _SpacyAnalysis:
+    """Score excitement, tension and modifiers from lexicon hits and an optional tagged Doc."""
+    excitement_count = hits["excitement"]
+    tension_count = hits["tension"]
+    has_intensifier = hits["intensifier"] > 0
+    has_negation = hits["negation"] > 0
     
-    # Analyze adjectives and adverbs for additional sentiment
-    adjectives = [token for token in doc if token.pos_ in ["ADJ", "ADV"]]
-    strong_adj_count = sum(1 for adj in adjectives if adj.lemma_.lower() in EXCITEMENT_LEMMAS)
+    # Analyze adjectives and adverbs for additional sentiment; they only add
+    # to the score alongside excitement words, so only those are tagged
+    adjective_count = 0
+    strong_adj_count = 0
+    for token in tagged:
+        if token.pos_ == "ADJ" or token.pos_ == "ADV":
+            adjective_count += 1
+            if token.lemma_.lower() in EXCITEMENT_LEMMAS:
+                strong_adj_count += 1
     
     # Calculate scores
-    word_count = len([t for t in doc if not t.is_punct and not t.is_space])
-    
     excitement_score = (excitement_count + strong_adj_count * 0.5) / max(word_count, 1)
     tension_score = tension_count / max(word_count, 1)
     
-    return {
-        "excitement_score": min(excitement_score * 3, 1.0),  # Normalize
-        "tension_score": min(tension_score * 3, 1.0),
-        "has_intensifier": intensifier_count > 0,
-        "has_negation": has_negation,
-        "adjective_count": len(adjectives),
-        "word_count": word_count
-    }
+    return _SpacyAnalysis(
+        excitement_score=min(excitement_score * 3, 1.0),  # Normalize
+        tension_score=min(tension_score * 3, 1.0),
+        has_intensifier=has_intensifier,
+        has_negation=has_negation,
+        adjective_count=adjective_count,
+        word_count=word_count
+    )
 
 
-def calculate_intensity(text: str) -> float:
-    """Calculate emotional intensity score (0-1) using spaCy and patterns."""
+def calculate_intensity(text: str, spacy_analysis: Dict = None) -> float:
+    """Calculate emotional intensity score (0-1) using spaCy and patterns.
+    
+    Pass spacy_analysis when it has already been computed for text.
+    """
     text_lower = text.lower()
     score = 0.0
     
     # spaCy-based analysis
-    spacy_analysis = analyze_with_spacy(text)
+    if spacy_analysis is None:
+        spacy_analysis = analyze_with_spacy(text)
     score += spacy_analysis["excitement_score"] * 0.4
     score += spacy_analysis["tension_score"] * 0.2
     
@@ -119,26 +250,24 @@ def calculate_intensity(text: str) -> float:
         score += 0.1
     
     # Check for high intensity patterns
-    for pattern in INTENSITY_PATTERNS["high"]:
-        if re.search(pattern, text, re.IGNORECASE):
+    for pattern in INTENSITY_PATTERNS_COMPILED["high"]:
+        if pattern.search(text):
             score += 0.2
     
     # Check for medium intensity patterns
-    for pattern in INTENSITY_PATTERNS["medium"]:
-        if re.search(pattern, text, re.IGNORECASE):
+    for pattern in INTENSITY_PATTERNS_COMPILED["medium"]:
+        if pattern.search(text):
             score += 0.08
     
+    exclamation_count, question_count, caps_chars, alpha_chars = _count_chars(text)
+    
     # Exclamation marks boost
-    exclamation_count = text.count("!")
     score += min(exclamation_count * 0.08, 0.25)
     
     # Question marks (uncertainty/anticipation)
-    question_count = text.count("?")
     score += min(question_count * 0.05, 0.1)
     
     # Caps lock ratio (shouting)
-    caps_chars = sum(1 for c in text if c.isupper())
-    alpha_chars = sum(1 for c in text if c.isalpha())
     if alpha_chars > 0:
         caps_ratio = caps_chars / alpha_chars
         if caps_ratio > 0.3:
@@ -172,10 +301,11 @@ def get_sentiment_label(intensity: float, tension_score: float = 0) -> str:
         return "calm"
 
 
-def calculate_intensity_with_volume(text: str, volume_score: float = 0.0) -> float:
+def calculate_intensity_with_volume(text: str, volume_score: float = 0.0,
+                                    spacy_analysis: Dict = None) -> float:
     """Calculate emotional intensity score (0-1) using text analysis + audio volume."""
     # Base text intensity
-    text_intensity = calculate_intensity(text)
+    text_intensity = calculate_intensity(text, spacy_analysis)
     
     # Weight: 60% text, 40% audio volume
     combined_intensity = (text_intensity * 0.6) + (volume_score * 0.4)
@@ -187,30 +317,48 @@ def calculate_intensity_with_volume(text: str, volume_score: float = 0.0) -> flo
     return round(combined_intensity, 2)
 
 
-def analyze_sentiment(segments: List[Dict], segments_with_volume: List[Dict] = None) -> List[Dict]:
+def analyze_sentiment(segments: List[Dict], segments_with_volume: List[Dict] = None,
+                      batch_size: int = 64) -> List[Dict]:
     """Analyze sentiment/intensity for each segment using spaCy and optional audio volume."""
     results = []
+    texts = [segment.get("text", "") for segment in segments]
     
-    # Create volume lookup if available
-    volume_lookup = {}
-    if segments_with_volume:
-        for seg in segments_with_volume:
-            time_key = round(seg.get("start", 0), 1)
-            volume_lookup[time_key] = seg.get("volume_score", 0)
+    # Analyze each distinct text once. Lexicon matching is plain Python; only
+    # texts with excitement words go through the tagger, batched with nlp.pipe
+    unique_texts = list(dict.fromkeys(texts))
+    hits_per_text = [_lexicon_hits(text) for text in unique_texts]
+    tagged_docs = [()] * len(unique_texts)
+    to_tag = [i for i, (hits, _) in enumerate(hits_per_text) if _needs_tagging(hits)]
+    if to_tag:
+        # Fan out to worker processes only for long transcripts (~100 tagged segments per worker)
+        n_process = pipe_n_process(len(to_tag), 100)
+        docs = nlp.pipe((unique_texts[i] for i in to_tag), batch_size=batch_size, n_process=n_process)
+        for i, doc in zip(to_tag, docs):
+            tagged_docs[i] = doc
+    analysis_by_text = {
+        text: _analyze_hits(hits, word_count, tagged)._asdict()
+        for text, (hits, word_count), tagged in zip(unique_texts, hits_per_text, tagged_docs)
+    }
+    
+    # Create volume lookup if available, keyed on integer tenths of a second
+    # so producer and consumer never disagree on a float key
+    volume_lookup = {
+        int(round(seg.get("start", 0) * 10)): seg.get("volume_score", 0)
+        for seg in segments_with_volume
+    } if segments_with_volume else {}
     
-    for segment in segments:
-        text = segment.get("text", "")
+    for segment, text in zip(segments, texts):
         start_time = segment.get("start", 0)
-        spacy_analysis = analyze_with_spacy(text)
+        spacy_analysis = analysis_by_text[text]
         
         # Get volume score if available
-        volume_score = volume_lookup.get(round(start_time, 1), 0)
+        volume_score = volume_lookup.get(int(round(start_time * 10)), 0) if volume_lookup else 0
         
         # Calculate intensity with or without volume
         if volume_score > 0:
-            intensity = calculate_intensity_with_volume(text, volume_score)
+            intensity = calculate_intensity_with_volume(text, volume_score, spacy_analysis)
         else:
-            intensity = calculate_intensity(text)
+            intensity = calculate_intensity(text, spacy_analysis)
         
         result = {
             "time": start_time,
@@ -237,6 +385,11 @@ def analyze_sentiment(segments: List[Dict], segments_with_volume: List[Dict] = N
     return results
 
 
+def _intensity_array(analyzed: List[Dict]) -> np.ndarray:
+    """Intensities of the analyzed moments as a float array, in segment order."""
+    return np.fromiter((m["intensity"] for m in analyzed), dtype=np.float64, count=len(analyzed))
+
+
 def get_exciting_moments(analyzed: List[Dict], threshold: float = 0.5) -> List[Dict]:
     """Get moments above intensity threshold."""
     return [m for m in analyzed if m["intensity"] >= threshold]
@@ -244,18 +397,28 @@ def get_exciting_moments(analyzed: List[Dict], threshold: float = 0.5) -> List[D
 
 def get_peak_moments(analyzed: List[Dict], top_n: int = 5) -> List[Dict]:
     """Get the top N most intense moments."""
-    sorted_moments = sorted(analyzed, key=lambda x: x["intensity"], reverse=True)
-    return sorted_moments[:top_n]
+    if top_n <= 0 or not analyzed:
+        return []
+    intensities = _intensity_array(analyzed)
+    candidates = np.arange(len(analyzed))
+    if top_n < len(analyzed):
+        # Partial selection: only moments at least as intense as the N-th
+        # highest are sorted, ties included so earlier moments win as in sorted()
+        cutoff = -np.partition(-intensities, top_n - 1)[top_n - 1]
+        candidates = np.flatnonzero(intensities >= cutoff)
+    order = candidates[np.argsort(-intensities[candidates], kind="stable")]
+    return [analyzed[i] for i in order[:top_n]]
 
 
 def get_intensity_summary(analyzed: List[Dict]) -> Dict:
     """Get comprehensive summary of intensity distribution."""
-    moods = {"exciting": 0, "moderate": 0, "calm": 0}
-    sentiments = {"very_exciting": 0, "exciting": 0, "tense": 0, "moderate": 0, "calm": 0}
-    
-    for m in analyzed:
-        moods[m["mood"]] += 1
-        sentiments[m.get("sentiment", "calm")] += 1
+    mood_counts = Counter(m["mood"] for m in analyzed)
+    sentiment_counts = Counter(m.get("sentiment", "calm") for m in analyzed)
+    moods = {mood: mood_counts[mood] for mood in ("exciting", "moderate", "calm")}
+    sentiments = {
+        sentiment: sentiment_counts[sentiment]
+        for sentiment in ("very_exciting", "exciting", "tense", "moderate", "calm")
+    }
     
     total = len(analyzed)
     avg_intensity = sum(m["intensity"] for m in analyzed) / total if total > 0 else 0
@@ -1,3 +1,4 @@
+import torch
 from transformers import pipeline
 from typing import List, Dict
 import re
@@ -6,30 +7,44 @@ import re
 # Load BART model for summarization
 summarizer = None
 
+# Title patterns, compiled once: "Team1 X - Y Team2" and "Team1 v Team2"
+_TITLE_RE_SCORE = re.compile(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s+(\d+)\s*[-\u2013]\s*(\d+)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)')
+_TITLE_RE_VS = re.compile(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s+(?:v|vs)\.?\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)')
+
 
 def extract_teams_and_score_from_title(title: str) -> dict:
     """Extract team names and score from video title."""
     # Pattern 1: "Team1 X - Y Team2" (e.g., "Man City 3 - 0 West Ham")
-    match = re.search(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s+(\d+)\s*[-–]\s*(\d+)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)', title)
+    match = _TITLE_RE_SCORE.search(title)
     if match:
+        team1, home_goals, away_goals, team2 = match.groups()
         return {
-            "teams": [match.group(1).strip(), match.group(4).strip()],
-            "score": f"{match.group(2)}-{match.group(3)}"
+            "teams": [team1.strip(), team2.strip()],
+            "score": f"{home_goals}-{away_goals}"
         }
     
     # Pattern 2: "Team1 v Team2" or "Team1 vs Team2" (e.g., "Portugal v Spain")
-    match = re.search(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s+(?:v|vs)\.?\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)', title)
+    match = _TITLE_RE_VS.search(title)
     if match:
-        return {"teams": [match.group(1).strip(), match.group(2).strip()], "score": None}
+        team1, team2 = match.groups()
+        return {"teams": [team1.strip(), team2.strip()], "score": None}
     
     return {"teams": [], "score": None}
 
 
 def load_summarizer():
-    """Lazy load the summarization model."""
+    """Lazy load the summarization model.
+    
+    On GPU this is BART-large-CNN in fp16; on CPU the distilled
+    distilbart-cnn-12-6, which is about twice as fast with near-identical ROUGE.
+    """
     global summarizer
     if summarizer is None:
-        summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
+        if torch.cuda.is_available():
+            summarizer = pipeline("summarization", model="facebook/bart-large-cnn",
+                                  device=0, torch_dtype=torch.float16)
+        else:
+            summarizer = pipeline("summarization", model="sshleifer/distilbart-cnn-12-6", device=-1)
     return summarizer
 
 
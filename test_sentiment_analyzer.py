@@ -0,0 +1,32 @@
+import random
+
+import pytest
+
+import sentiment_analyzer as sa
+
+requires_automaton = pytest.mark.skipif(sa.LEXICON_AC is None, reason="pyahocorasick not installed")
+
+
+@requires_automaton
+def test_automaton_matches_lemma_path_on_every_lexicon_form():
+    mismatches = []
+    for form in sorted(sa._lexicon_candidates()):
+        tokens = sa._TOKEN_RE.findall(form.lower())
+        if +sa._automaton_hits(tokens) != +sa._lemma_hits(tokens):
+            mismatches.append(form)
+    assert mismatches == []
+
+
+@requires_automaton
+def test_automaton_matches_lemma_path_on_mixed_tokens():
+    rng = random.Random(0)
+    words = sorted(sa.LEXICON_FORMS) + ["nt", "don't", "the", "ball", "keeper"]
+    for _ in range(500):
+        tokens = sa._TOKEN_RE.findall(" ".join(rng.choices(words, k=8)).lower())
+        assert +sa._automaton_hits(tokens) == +sa._lemma_hits(tokens), tokens
+
+
+@pytest.mark.skipif(sa.LEMMA_LOOKUP is None, reason="spacy-lookups-data not installed")
+def test_inflected_forms_are_matched():
+    hits, _ = sa._lexicon_hits("Two injuries already and the keeper is hurting, the closest chance")
+    assert hits["tension"] == 3
@@ -1,9 +1,61 @@
+import numpy as np
 import whisper
+from typing import Union
 
-def transcribe_audio(audio_path: str, model_name: str = "base") -> dict:
-    """Transcribe audio to text with timestamps using Whisper."""
-    model = whisper.load_model(model_name)
-    result = model.transcribe(audio_path, word_timestamps=True)
+try:
+    import ctranslate2
+    from faster_whisper import WhisperModel
+except ImportError:
+    WhisperModel = None
+
+# Loaded Whisper models by name; loading re-reads the weights from disk and
+# re-initializes the device, so it only happens once per model per process
+_MODEL_CACHE = {}
+
+
+def load_model(model_name: str = "base"):
+    """Return the Whisper model for model_name, loading it on first use.
+    
+    Uses faster-whisper (CTranslate2) when installed: float16 on GPU and int8
+    on CPU. Otherwise falls back to the reference FP32 openai-whisper model.
+    """
+    model = _MODEL_CACHE.get(model_name)
+    if model is None:
+        if WhisperModel is not None:
+            if ctranslate2.get_cuda_device_count() > 0:
+                model = WhisperModel(model_name, device="cuda", compute_type="float16")
+            else:
+                model = WhisperModel(model_name, device="cpu", compute_type="int8")
+        else:
+            model = whisper.load_model(model_name)
+        _MODEL_CACHE[model_name] = model
+    return model
+
+
+def transcribe_audio(audio: Union[str, np.ndarray], model_name: str = "base") -> dict:
+    """Transcribe audio to text with timestamps using Whisper.
+    
+    Accepts a file path or 16 kHz mono samples; int16 PCM is scaled to the
+    float32 [-1, 1] range Whisper expects.
+    """
+    if isinstance(audio, np.ndarray) and np.issubdtype(audio.dtype, np.integer):
+        audio = audio.astype(np.float32) / 32768.0
+    
+    model = load_model(model_name)
+    
+    if WhisperModel is not None:
+        # faster-whisper yields segments lazily; decoding happens while iterating
+        raw_segments, _ = model.transcribe(audio, word_timestamps=True)
+        segments = [
+            {"start": segment.start, "end": segment.end, "text": segment.text}
+            for segment in raw_segments
+        ]
+        return {
+            "text": "".join(segment["text"] for segment in segments),
+            "segments": segments
+        }
+    
+    result = model.transcribe(audio, word_timestamps=True)
     
     # Extract segments with timestamps
     segments = []
@@ -17,4 +69,4 @@ def transcribe_audio(audio_path: str, model_name: str = "base") -> dict:
     return {
         "text": result["text"],
         "segments": segments
-    }
\ No newline at end of file
+    }